@@ -4,7 +4,15 @@ st.set_page_config(page_title="🏌️高爾夫BANK v1.3", layout="centered")
 # =================== Imports ===================
 import os
 import io
-from datetime import datetime
+import json
+import hashlib
+import zlib
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import pandas as pd
 import pytz
 import qrcode
@@ -46,13 +54,365 @@ def init_firebase():
     db_client = firestore.client(app=app)
     return db_client
 
-# 若 db 不存在或型別不對就重新初始化（避免 AttributeError）
-if "db" not in st.session_state or not hasattr(st.session_state.get("db", None), "collection"):
-    st.session_state.db = init_firebase()
+# =================== Firestore 用量統計 + 預算 ===================
+# 以 MeteredClient 包住 init_firebase() 的 client，依 session / game / path 三個維度
+# 累計讀寫次數與粗估位元組；計數器為整個程序共用（重啟後歸零）。
+BUDGET_CFG = st.secrets.get("budget", {})
+GAME_READ_BUDGET = int(BUDGET_CFG.get("game_reads", 2000))       # 每場賽事讀取上限
+GAME_WRITE_BUDGET = int(BUDGET_CFG.get("game_writes", 1000))     # 每場賽事寫入上限
+VIEW_REFRESH_MS = int(BUDGET_CFG.get("view_refresh_ms", 10000))  # 查看端正常刷新間隔
+VIEW_REFRESH_SLOW_MS = int(BUDGET_CFG.get("view_refresh_slow_ms", 60000))  # 超過讀取預算後的刷新間隔
+WRITE_THROTTLE_S = int(BUDGET_CFG.get("write_throttle_s", 30))  # 超過寫入預算後，寫回的最短間隔（秒）
+
+OP_FIELDS = ["reads", "writes", "deletes", "bytes_read", "bytes_written"]
+OP_STATS_MAX_SESSIONS = 100  # session / game 維度只保留最近活動的 N 個，避免無限成長
+OP_STATS_MAX_GAMES = 200     # （game_id 可能來自網址參數，打錯的 ID 也會產生一列）
+
+def approx_size(value):
+    """依 Firestore 計算規則粗估一個值的大小（bytes）。"""
+    if isinstance(value, dict):
+        return sum(len(str(k).encode("utf-8")) + 1 + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(approx_size(v) for v in value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if value is None or isinstance(value, bool):
+        return 1
+    return 8
+
+class OpStats:
+    """程序共用的用量計數器：{維度: {key: {reads, writes, ...}}}。
+
+    session 與 game 維度是 LRU，超過上限就淘汰最久沒動的一列（該場預算也跟著重新計算）；
+    path 維度只有固定幾種，不設上限。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dims = {"session": OrderedDict(), "game": OrderedDict(), "path": OrderedDict()}
+        self.limits = {"session": OP_STATS_MAX_SESSIONS, "game": OP_STATS_MAX_GAMES}
+
+    def add(self, session_id, game_id, path, field, n=1, nbytes=0):
+        bytes_field = "bytes_written" if field in ("writes", "deletes") else "bytes_read"
+        with self.lock:
+            for dim, key in (("session", session_id), ("game", game_id or "-"), ("path", path)):
+                rows = self.dims[dim]
+                row = rows.setdefault(key, dict.fromkeys(OP_FIELDS, 0))
+                rows.move_to_end(key)
+                limit = self.limits.get(dim)
+                while limit and len(rows) > limit:
+                    rows.popitem(last=False)
+                row[field] += n
+                row[bytes_field] += nbytes
+
+    def get(self, dim, key):
+        with self.lock:
+            return dict(self.dims[dim].get(key) or dict.fromkeys(OP_FIELDS, 0))
+
+    def to_frame(self):
+        with self.lock:
+            rows = [{"dim": d, "key": k, **v} for d, keyed in self.dims.items() for k, v in keyed.items()]
+        return pd.DataFrame(rows, columns=["dim", "key"] + OP_FIELDS).sort_values(["dim", "key"])
+
+@st.cache_resource(show_spinner=False)
+def get_op_stats():
+    return OpStats()
+
+class MeteredRef:
+    """包住 CollectionReference / DocumentReference / Query，記錄每次讀寫。"""
+
+    def __init__(self, ref, meter):
+        self._ref = ref
+        self._meter = meter
+
+    def _wrap(self, name):
+        def call(*args, **kwargs):
+            return MeteredRef(getattr(self._ref, name)(*args, **kwargs), self._meter)
+        return call
+
+    def __getattr__(self, name):
+        if name in ("collection", "document", "order_by", "limit", "start_at", "end_at"):
+            return self._wrap(name)
+        return getattr(self._ref, name)
+
+    def where(self, *args, filter=None, **kwargs):
+        # FieldFilter 的值若是包過的文件參照（例如 __name__ 範圍查詢），還原成原本的參照
+        if filter is not None and isinstance(getattr(filter, "value", None), MeteredRef):
+            filter = firestore.FieldFilter(filter.field_path, filter.op_string, filter.value._ref)
+        if filter is not None:
+            kwargs["filter"] = filter
+        return MeteredRef(self._ref.where(*args, **kwargs), self._meter)
+
+    def get(self, *args, **kwargs):
+        result = self._ref.get(*args, **kwargs)
+        if isinstance(result, list):   # Query.get
+            self._meter.record_docs(result)
+        else:                          # DocumentReference.get
+            self._meter.record("reads", 1, approx_size(result.to_dict() or {}))
+        return result
+
+    def stream(self, *args, **kwargs):
+        count = 0
+        for snap in self._ref.stream(*args, **kwargs):
+            count += 1
+            self._meter.record("reads", 1, approx_size(snap.to_dict() or {}))
+            yield snap
+        if count == 0:
+            self._meter.record("reads", 1)  # 空查詢仍計 1 次讀取
+
+    def count(self, *args, **kwargs):
+        return MeteredAggregation(self._ref.count(*args, **kwargs), self._meter)
+
+class MeteredAggregation:
+    """包住 count() 聚合查詢；每 1000 筆索引項目計 1 次讀取，這裡一律記 1 次。"""
+
+    def __init__(self, query, meter):
+        self._query = query
+        self._meter = meter
+
+    def get(self, *args, **kwargs):
+        result = self._query.get(*args, **kwargs)
+        self._meter.record("reads", 1)
+        return result
+
+    def set(self, data, *args, **kwargs):
+        self._meter.record("writes", 1, approx_size(data))
+        return self._ref.set(data, *args, **kwargs)
+
+    def update(self, data, *args, **kwargs):
+        self._meter.record("writes", 1, approx_size(data))
+        return self._ref.update(data, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._meter.record("deletes", 1)
+        return self._ref.delete(*args, **kwargs)
+
+class MeteredBatch:
+    """包住 WriteBatch，commit 時才把累積的寫入記進統計。"""
+
+    def __init__(self, batch, meter):
+        self._batch = batch
+        self._meter = meter
+        self._pending = []
+
+    def set(self, ref, data, *args, **kwargs):
+        self._pending.append(("writes", approx_size(data)))
+        return self._batch.set(getattr(ref, "_ref", ref), data, *args, **kwargs)
+
+    def update(self, ref, data, *args, **kwargs):
+        self._pending.append(("writes", approx_size(data)))
+        return self._batch.update(getattr(ref, "_ref", ref), data, *args, **kwargs)
+
+    def delete(self, ref, *args, **kwargs):
+        self._pending.append(("deletes", 0))
+        return self._batch.delete(getattr(ref, "_ref", ref), *args, **kwargs)
+
+    def commit(self):
+        result = self._batch.commit()
+        for field, nbytes in self._pending:
+            self._meter.record(field, 1, nbytes)
+        self._pending = []
+        return result
+
+class MeteredClient:
+    """Firestore client 的薄包裝；用 scope(path, game_id) 標記目前的程式路徑與賽事。"""
+
+    def __init__(self, client, stats, session_id):
+        self._client = client
+        self.stats = stats
+        self.session_id = session_id
+        self.path = "other"
+        self.game_id = None
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def collection(self, *args, **kwargs):
+        return MeteredRef(self._client.collection(*args, **kwargs), self)
+
+    def batch(self):
+        return MeteredBatch(self._client.batch(), self)
+
+    @contextmanager
+    def scope(self, path, game_id=None):
+        prev = (self.path, self.game_id)
+        self.path, self.game_id = path, game_id
+        try:
+            yield self
+        finally:
+            self.path, self.game_id = prev
+
+    def record(self, field, n=1, nbytes=0):
+        self.stats.add(self.session_id, self.game_id, self.path, field, n, nbytes)
+
+    def record_docs(self, snaps):
+        for snap in snaps:
+            self.record("reads", 1, approx_size(snap.to_dict() or {}))
+        if not snaps:
+            self.record("reads", 1)
+
+    def game_over_budget(self, game_id, field):
+        limit = GAME_READ_BUDGET if field == "reads" else GAME_WRITE_BUDGET
+        return self.stats.get("game", game_id)[field] > limit
+
+if "session_uid" not in st.session_state:
+    st.session_state.session_uid = uuid.uuid4().hex[:8]
+
+# 若 db 不存在或尚未包上 MeteredClient 才初始化（避免 AttributeError）
+# 每次 rerun 都會重新定義 MeteredClient 類別，不能用 isinstance，改看有沒有 scope()
+if not hasattr(st.session_state.get("db", None), "scope"):
+    st.session_state.db = MeteredClient(init_firebase(), get_op_stats(), st.session_state.session_uid)
 
 db = st.session_state.db
 st.session_state.firebase_initialized = True
 
+# =================== 賽事歸檔（冷熱分離） ===================
+# 已結束的舊賽事從 golf_games 搬到 golf_games_archive，
+# 每月一份文件（ID = yymm），games 欄位內以 game_id 為 key 存放壓縮後的賽事資料。
+GAMES_COLLECTION = "golf_games"
+ARCHIVE_COLLECTION = "golf_games_archive"
+ARCHIVE_AFTER_DAYS = int(st.secrets.get("archive", {}).get("after_days", 30))
+ARCHIVE_BATCH_SIZE = 200  # 每批搬移場數（Firestore 單批上限 500 筆寫入）
+# 設計上假設一個月壓縮後的賽事少於約 1 MiB（Firestore 單一文件上限）；
+# 真的超過時依序寫入溢位文件 yymm_2、yymm_3 …，這裡留一些餘裕給欄位名稱等開銷。
+ARCHIVE_DOC_LIMIT = 900 * 1024
+
+def pack_game(game_data):
+    """賽事 dict → zlib 壓縮的 JSON bytes。"""
+    raw = json.dumps(game_data, ensure_ascii=False, default=str)
+    return zlib.compress(raw.encode("utf-8"), 9)
+
+def unpack_game(blob):
+    """pack_game 的反向操作。"""
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+def archive_month_id(game_id):
+    """game_id（yymmdd_NN）→ 歸檔文件 ID（yymm）；格式不符回傳 None。"""
+    prefix = game_id[:4]
+    return prefix if len(prefix) == 4 and prefix.isdigit() else None
+
+def archive_shard_id(month_id, shard):
+    """第 1 份歸檔文件為 yymm，溢位文件為 yymm_2、yymm_3 …"""
+    return month_id if shard == 1 else f"{month_id}_{shard}"
+
+def load_game(db, game_id):
+    """先查熱資料，找不到再依序查該月份的歸檔文件（通常一次讀取即命中）。
+
+    回傳 (賽事 dict, 是否來自歸檔)；都找不到回傳 (None, False)。
+    """
+    doc = db.collection(GAMES_COLLECTION).document(game_id).get()
+    if doc.exists:
+        return doc.to_dict(), False
+
+    month_id = archive_month_id(game_id)
+    if month_id is None:
+        return None, False
+    shard = 1
+    while True:
+        archive_doc = db.collection(ARCHIVE_COLLECTION).document(archive_shard_id(month_id, shard)).get()
+        if not archive_doc.exists:
+            return None, False
+        blob = (archive_doc.to_dict().get("games") or {}).get(game_id)
+        if blob is not None:
+            return unpack_game(blob), True
+        shard += 1
+
+def archive_old_games(db, older_than_days=ARCHIVE_AFTER_DAYS):
+    """把建立日早於 older_than_days 天前的賽事搬進歸檔集合，回傳搬移場數。"""
+    tz = pytz.timezone("Asia/Taipei")
+    cutoff_str = (datetime.now(tz) - timedelta(days=older_than_days)).strftime("%y%m%d")
+    games_ref = db.collection(GAMES_COLLECTION)
+
+    # 文件 ID 以 yymmdd 開頭，"yymmdd_NN" < cutoff_str 即代表早於該日
+    old_docs = games_ref.where(
+        filter=firestore.FieldFilter("__name__", "<", games_ref.document(cutoff_str))
+    ).stream()
+
+    by_month = {}
+    for doc in old_docs:
+        month_id = archive_month_id(doc.id)
+        if month_id is None:
+            continue
+        by_month.setdefault(month_id, []).append(doc)
+
+    def load_shards(month_id):
+        """讀出該月份所有既有歸檔文件：[{ref, size, games: {game_id: 大小}}]。"""
+        shards = []
+        while True:
+            ref = db.collection(ARCHIVE_COLLECTION).document(archive_shard_id(month_id, len(shards) + 1))
+            snap = ref.get()
+            if not snap.exists:
+                return shards
+            data = snap.to_dict() or {}
+            shards.append({
+                "ref": ref,
+                "size": approx_size(data),
+                "games": {gid: approx_size({gid: b}) for gid, b in (data.get("games") or {}).items()},
+            })
+
+    def new_shard(month_id, shards):
+        ref = db.collection(ARCHIVE_COLLECTION).document(archive_shard_id(month_id, len(shards) + 1))
+        shards.append({"ref": ref, "size": 0, "games": {}})
+
+    def commit_chunk(shards, month_id, pending, chunk):
+        # 同一批內先寫歸檔（含刪除舊副本）再刪熱資料，確保不會遺失
+        batch = db.batch()
+        for idx, games in pending.items():
+            batch.set(shards[idx]["ref"], {
+                "month": month_id,
+                "games": games,
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }, merge=True)
+        for d in chunk:
+            batch.delete(d.reference)
+        batch.commit()
+
+    moved = 0
+    for month_id, docs in by_month.items():
+        shards = load_shards(month_id)
+        if not shards:
+            new_shard(month_id, shards)
+        owner = {gid: idx for idx, sh in enumerate(shards) for gid in sh["games"]}
+        cur = 0
+        pending, chunk = {}, []   # pending: {shard 索引: {game_id: blob 或 DELETE_FIELD}}
+        for d in docs:
+            blob = pack_game(d.to_dict())
+            blob_size = approx_size({d.id: blob})
+            if blob_size > ARCHIVE_DOC_LIMIT:
+                raise ValueError(f"賽事 {d.id} 壓縮後仍有 {blob_size} bytes，超過單一歸檔文件上限")
+
+            # 已歸檔過的賽事（主控端又寫回熱資料）→ 同一批刪掉舊副本，避免 load_game 讀到舊資料
+            old = owner.pop(d.id, None)
+            if old is not None:
+                shards[old]["size"] -= shards[old]["games"].pop(d.id)
+                pending.setdefault(old, {})[d.id] = firestore.DELETE_FIELD
+
+            # 優先放回原本的文件；放不下就往後找，沒有空間就開新的溢位文件
+            if old is not None and shards[old]["size"] + blob_size <= ARCHIVE_DOC_LIMIT:
+                idx = old
+            else:
+                while shards[cur]["size"] + blob_size > ARCHIVE_DOC_LIMIT:
+                    cur += 1
+                    if cur == len(shards):
+                        new_shard(month_id, shards)
+                idx = cur
+            pending.setdefault(idx, {})[d.id] = blob
+            shards[idx]["games"][d.id] = blob_size
+            shards[idx]["size"] += blob_size
+            owner[d.id] = idx
+            chunk.append(d)
+
+            if len(chunk) >= ARCHIVE_BATCH_SIZE:
+                commit_chunk(shards, month_id, pending, chunk)
+                moved += len(chunk)
+                pending, chunk = {}, []
+        if chunk:
+            commit_chunk(shards, month_id, pending, chunk)
+            moved += len(chunk)
+    return moved
+
 # =================== 讀取 CSV（球場與球員） ===================
 CSV_PATH = "players.csv"
 COURSE_DB_PATH = "course_db.csv"
@@ -69,6 +429,28 @@ if "players" not in st.session_state:
     else:
         st.session_state.players = []
 
+# =================== 分享資源快取（QR Code） ===================
+# 以賽事網址為 key 的程序共用快取（cache_resource），所有 session 共用同一份 PNG bytes。
+VIEW_URL_BASE = "https://bankver13.streamlit.app/?mode=view&game_id="
+SHARE_CACHE_MAX_ITEMS = 256
+
+def game_share_url(game_id):
+    return f"{VIEW_URL_BASE}{game_id}"
+
+@st.cache_resource(max_entries=SHARE_CACHE_MAX_ITEMS, show_spinner=False)
+def render_qr_png(url):
+    """把網址畫成 QR Code，回傳 PNG bytes。"""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=8, border=4)
+    qr.add_data(url)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="darkgreen", back_color="white")
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format="PNG")
+    return img_bytes.getvalue()
+
+def game_qr_png(game_id):
+    return render_qr_png(game_share_url(game_id))
+
 # =================== URL 參數 & 模式切換 ===================
 params = st.query_params
 if params.get("mode") == "view":
@@ -111,9 +493,45 @@ if mode == "主控操作端":
     par = front_par + back_par
     hcp = front_hcp + back_hcp
 
+    # ------- 管理：舊賽事歸檔 -------
+    with st.sidebar.expander("🗄️ 舊賽事歸檔"):
+        archive_days = st.number_input(
+            "歸檔幾天前的賽事", min_value=1, max_value=3650,
+            value=ARCHIVE_AFTER_DAYS, step=1, key="archive_days"
+        )
+        if st.button("開始歸檔", key="archive_btn"):
+            try:
+                with st.session_state.db.scope("archive"):
+                    moved = archive_old_games(st.session_state.db, int(archive_days))
+                st.success(f"✅ 已歸檔 {moved} 場賽事")
+            except Exception as e:
+                st.error(f"❌ 歸檔失敗：{e}")
+
+    # ------- 管理：Firestore 用量 -------
+    with st.sidebar.expander("📈 Firestore 用量"):
+        stats_df = st.session_state.db.stats.to_frame()
+        st.caption(f"每場預算：讀取 {GAME_READ_BUDGET} / 寫入 {GAME_WRITE_BUDGET}（程序重啟後歸零）")
+        db = st.session_state.db
+        st.markdown("**本 Session**")
+        st.dataframe(
+            pd.DataFrame([db.stats.get("session", db.session_id)], index=[db.session_id]),
+            use_container_width=True
+        )
+        dim_labels = {"game": "依賽事", "path": "依程式路徑"}
+        for dim, label in dim_labels.items():
+            st.markdown(f"**{label}**")
+            st.dataframe(
+                stats_df[stats_df["dim"] == dim].drop(columns="dim").set_index("key"),
+                use_container_width=True
+            )
+        st.download_button(
+            "⬇️ 匯出 CSV", stats_df.to_csv(index=False).encode("utf-8"),
+            file_name="firestore_usage.csv", mime="text/csv"
+        )
+
 # =================== 若已有 QR / ID 就顯示 ===================
-if "game_id" in st.session_state and "qr_bytes" in st.session_state:
-    st.image(st.session_state.qr_bytes, width=180, caption="賽況查詢")
+if st.session_state.get("game_initialized") and st.session_state.get("game_id"):
+    st.image(game_qr_png(st.session_state.game_id), width=180, caption="賽況查詢")
     st.markdown(f"**🔐 遊戲 ID： `{st.session_state.game_id}`**")
     st.markdown("---")
 
@@ -135,12 +553,12 @@ if mode == "隊員查看端":
 
     db = st.session_state.db
     game_id = st.session_state.game_id
-    doc = db.collection("golf_games").document(game_id).get()
-    if not doc.exists:
+    with db.scope("viewer", game_id):
+        game_data, is_archived = load_game(db, game_id)
+    if game_data is None:
         st.error(f"❌ Firebase 中找不到比賽 `{game_id}`")
         st.stop()
 
-    game_data = doc.to_dict()
     players        = game_data["players"]
     bank_points    = game_data.get("points", {p: 0 for p in players})
     hole_points    = game_data.get("hole_points", {p: 0 for p in players})
@@ -200,8 +618,17 @@ if mode == "隊員查看端":
         for line in hole_logs:
             st.write(line)
 
-    # 自動刷新（每 10 秒）
-    st_autorefresh(interval=10000, key="view_autorefresh")
+    # 已歸檔的賽事不會再變動，不需要自動刷新
+    if is_archived:
+        st.caption("🗄️ 此賽事已歸檔，不再自動刷新")
+        st.stop()
+
+    # 自動刷新（正常每 10 秒；該場超過讀取預算時拉長間隔）
+    refresh_ms = VIEW_REFRESH_MS
+    if db.game_over_budget(game_id, "reads"):
+        refresh_ms = VIEW_REFRESH_SLOW_MS
+        st.caption(f"⏳ 本場讀取量已超過預算，改為每 {refresh_ms // 1000} 秒刷新")
+    st_autorefresh(interval=refresh_ms, key="view_autorefresh")
     st.stop()
 
 # =================== 主控操作端：球員/差點/賭金 ===================
@@ -267,9 +694,10 @@ with col_b:
 
 if reset_btn:
     for k in [
-        "game_initialized", "game_id", "qr_bytes", "scores_df", "events_df",
+        "game_initialized", "game_id", "scores_df", "events_df",
         "running_points", "current_titles", "hole_logs", "point_bank",
-        "confirmed_holes", "current_hole", "hole_points"
+        "confirmed_holes", "current_hole", "hole_points", "last_sync_sig",
+        "last_sync_at", "last_sync_holes"
     ]:
         if k in st.session_state:
             del st.session_state[k]
@@ -293,10 +721,19 @@ if start_btn:
     tz = pytz.timezone("Asia/Taipei")
     today_str = datetime.now(tz).strftime("%y%m%d")
     db = st.session_state.db
-    games_ref = db.collection("golf_games")
-    same_day_count = sum(1 for doc in games_ref.stream() if doc.id.startswith(today_str))
+    games_ref = db.collection(GAMES_COLLECTION)
+    # 只對今天的 ID 範圍（yymmdd ~ yymmdd + \uf8ff）做 count() 聚合，不讀出文件
+    with db.scope("create_game"):
+        count_result = games_ref.where(
+            filter=firestore.FieldFilter("__name__", ">=", games_ref.document(today_str))
+        ).where(
+            filter=firestore.FieldFilter("__name__", "<", games_ref.document(today_str + "\uf8ff"))
+        ).count().get()
+    same_day_count = int(count_result[0][0].value)
     game_id = f"{today_str}_{same_day_count + 1:02d}"
     st.session_state.game_id = game_id
+    # 建賽時就先畫好分享用 QR，之後各 session 直接取快取
+    qr_png = game_qr_png(game_id)
 
     game_data = {
         "created_date": today_str,
@@ -316,23 +753,14 @@ if start_btn:
         "hole_bet_per_person": hole_bet_per_person,
         "completed_holes": 0
     }
-    db.collection("golf_games").document(game_id).set(game_data)
+    with db.scope("create_game", game_id):
+        db.collection(GAMES_COLLECTION).document(game_id).set(game_data)
     st.session_state.game_initialized = True
 
     st.success("✅ 賽事資料已寫入 Firebase")
     st.write("🆔 賽事編號：", game_id)
 
-    game_url = f"https://bankver13.streamlit.app/?mode=view&game_id={game_id}"
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=8, border=4)
-    qr.add_data(game_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="darkgreen", back_color="white")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="PNG")
-    img_bytes.seek(0)
-    st.session_state.qr_bytes = img_bytes
-
-    st.image(img_bytes, width=180, caption="賽況查詢（掃碼免登入）")
+    st.image(qr_png, width=180, caption="賽況查詢（掃碼免登入）")
     st.markdown(f"**🔐 遊戲 ID： `{game_id}`**")
     st.markdown("---")
 
@@ -707,15 +1135,39 @@ else:
     if "db" not in st.session_state or not hasattr(st.session_state.db, "collection"):
         st.error("⚠️ Firebase 連線失效，成績無法寫回雲端，請重新整理後再試。")
     else:
-        try:
-            st.session_state.db.collection("golf_games") \
-                .document(st.session_state.game_id).set(game_data_update)
-        except Exception as e:
-            st.error(f"❌ Firebase 寫入失敗：{e}")
+        db = st.session_state.db
+        game_id = st.session_state.game_id
+        # 內容沒變就不寫回；超過寫入預算後，除了確認新洞以外，
+        # 每 WRITE_THROTTLE_S 秒最多寫回一次（有待同步的變更時排一次自動 rerun 補寫）
+        update_sig = hashlib.sha256(
+            json.dumps(game_data_update, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        changed = st.session_state.get("last_sync_sig") != update_sig
+        new_hole = st.session_state.get("last_sync_holes") != completed
+        throttled = False
+        if changed and not new_hole and db.game_over_budget(game_id, "writes"):
+            since_last = time.time() - st.session_state.get("last_sync_at", 0)
+            throttled = since_last < WRITE_THROTTLE_S
+            st.warning(
+                f"⚠️ 本場寫入量已超過預算（{GAME_WRITE_BUDGET}），"
+                f"未確認的變更最多每 {WRITE_THROTTLE_S} 秒同步一次，確認洞成績時會立即同步。"
+            )
+            if throttled:
+                from streamlit_autorefresh import st_autorefresh
+                wait_ms = max(1000, int((WRITE_THROTTLE_S - since_last) * 1000))
+                st_autorefresh(interval=wait_ms, key="sync_autorefresh")
+        if changed and not throttled:
+            try:
+                with db.scope("rerun_sync", game_id):
+                    db.collection(GAMES_COLLECTION).document(game_id).set(game_data_update)
+                st.session_state.last_sync_sig = update_sig
+                st.session_state.last_sync_at = time.time()
+                st.session_state.last_sync_holes = completed
+            except Exception as e:
+                st.error(f"❌ Firebase 寫入失敗：{e}")
 
 # =================== 底部 Game ID & QR ===================
 if "game_id" in st.session_state and st.session_state.game_id:
     st.markdown("---")
     st.markdown(f"🆔 **Game ID**：`{st.session_state.game_id}`")
-    if "qr_bytes" in st.session_state:
-        st.image(st.session_state.qr_bytes, width=160, caption="隊員掃碼查看（免登入）")
+    st.image(game_qr_png(st.session_state.game_id), width=160, caption="隊員掃碼查看（免登入）")